@@ -5,12 +5,13 @@ Este script otimiza fotos e vídeos baixados do Google Fotos,
 reduzindo o tamanho dos arquivos enquanto mantém a qualidade visual.
 
 Requisitos:
-- Python 3.6+
+- Python 3.7+
 - Pillow (PIL Fork)
 - ffmpeg-python
 - tqdm (para barra de progresso)
 """
 
+import io
 import os
 import sys
 import json
@@ -18,20 +19,32 @@ import shutil
 import time
 import logging
 import argparse
+import asyncio
+import functools
+import subprocess
 import concurrent.futures
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional, Union
+from typing import List, Dict, Iterable, NamedTuple, Set, Tuple, Optional, Union
 
 try:
-    from PIL import Image, ImageFile
+    import PIL
+    from PIL import Image, ImageFile, features
     import ffmpeg
     from tqdm import tqdm
+    from tqdm.asyncio import tqdm as tqdm_asyncio
 except ImportError:
     print("Erro: Dependências não instaladas.")
     print("Execute: pip install pillow ffmpeg-python tqdm")
     sys.exit(1)
 
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
 # Configuração de logging
 logging.basicConfig(
     level=logging.INFO,
@@ -43,6 +56,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Definido no nível do módulo para valer também nos processos de trabalho
+ImageFile.LOAD_TRUNCATED_IMAGES = True
+
 # Configurações padrão
 CONFIGURACOES = {
     "imagens": {
@@ -52,25 +68,377 @@ CONFIGURACOES = {
         "converter_png_para_jpg": False,
         "ignorar_pequenas": True,
         "tamanho_minimo_kb": 100,
+        "otimizar_huffman": False,
     },
     "videos": {
         "crf": 23,
         "codec": "libx264",
+        "aceleracao_hardware": True,
+        "processos": None,  # None = processos gerais // 4
+        "threads": None,    # None = processos gerais // vídeos em paralelo
         "preset": "medium",
         "audio_bitrate": "128k",
         "escala_max": None,
         "ignorar_pequenos": True,
         "tamanho_minimo_mb": 5,
+        "pular_eficientes": True,
+        "codecs_eficientes": ["h264", "hevc"],
+        "bitrate_eficiente_kbps": 4000,  # referência para 1080p
     },
     "geral": {
         "processos": os.cpu_count(),
         "manter_originais": True,
         "pasta_backup": None,
+        "modo_backup": "hardlink",
         "extensoes_imagem": [".jpg", ".jpeg", ".png", ".webp"],
         "extensoes_video": [".mp4", ".mov", ".avi", ".mkv"],
     }
 }
 
+
+SUFIXOS_JSON = ['.supplemental-metadata.json', '.json']
+
+
+def ler_json(caminho: Path) -> Dict:
+    return json_loads(caminho.read_bytes())
+
+
+def localizar_metadata_json(caminho_arquivo: Path) -> List[Path]:
+    """Procura no disco os arquivos JSON do Google Fotos de uma mídia."""
+    candidatos = (Path(f"{caminho_arquivo}{sufixo}") for sufixo in SUFIXOS_JSON)
+    return [candidato for candidato in candidatos if candidato.exists()]
+
+
+def ler_metadata_json(caminho_arquivo: Path, 
+                      sidecars: Optional[List[Path]] = None) -> Optional[Dict]:
+    """Lê o JSON de metadados da mídia, preferindo o .supplemental-metadata.json.
+    
+    `sidecars` é a lista já encontrada por procurar_arquivos; sem ela, os
+    candidatos são verificados no disco.
+    """
+    try:
+        if sidecars is None:
+            sidecars = localizar_metadata_json(caminho_arquivo)
+        if sidecars:
+            return ler_json(sidecars[0])
+        return None
+    except Exception as e:
+        logger.warning(f"Erro ao ler metadata JSON para {caminho_arquivo.name}: {e}")
+        return None
+
+
+def copiar_metadata_json(origem: Path, destino: Path, 
+                         sidecars: Optional[List[Path]] = None) -> None:
+    try:
+        if sidecars is None:
+            sidecars = localizar_metadata_json(origem)
+        prefixo = len(str(origem))
+        for json_origem in sidecars:
+            json_destino = Path(f"{destino}{str(json_origem)[prefixo:]}")
+            shutil.copy2(json_origem, json_destino)
+    except Exception as e:
+        logger.warning(f"Erro ao copiar metadata JSON: {e}")
+
+
+def aplicar_data_captura(caminho: Path, metadata: Optional[Dict]) -> None:
+    """Usa o photoTakenTime do JSON do Google Fotos como data de modificação do arquivo."""
+    try:
+        timestamp = (metadata or {}).get("photoTakenTime", {}).get("timestamp")
+        if timestamp:
+            ts = int(timestamp)
+            os.utime(caminho, (ts, ts))
+    except (ValueError, TypeError, AttributeError, OSError) as e:
+        logger.debug(f"Não foi possível aplicar a data de captura em {caminho.name}: {e}")
+
+
+MODOS_BACKUP = ["hardlink", "reflink", "copy"]
+FICLONE = 0x40049409  # ioctl do Linux para reflink (btrfs, XFS)
+
+
+def clonar_arquivo(origem: Path, destino: Path) -> None:
+    """Cria um reflink (cópia copy-on-write) de origem em destino."""
+    if sys.platform.startswith("linux"):
+        import fcntl
+        with open(origem, 'rb') as f_origem, open(destino, 'wb') as f_destino:
+            fcntl.ioctl(f_destino.fileno(), FICLONE, f_origem.fileno())
+    elif sys.platform == "darwin":
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.clonefile(os.fsencode(origem), os.fsencode(destino), 0) != 0:
+            erro = ctypes.get_errno()
+            raise OSError(erro, os.strerror(erro), str(destino))
+    else:
+        raise OSError(f"Reflink não suportado em {sys.platform}")
+    shutil.copystat(origem, destino)
+
+
+def mesmo_arquivo(a: Path, b: Path) -> bool:
+    """Indica se os dois caminhos apontam para o mesmo arquivo (ou hardlink dele)."""
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return os.path.abspath(a) == os.path.abspath(b)
+
+
+def fazer_backup(origem: Path, destino: Path, modo: str = "hardlink") -> None:
+    """Preserva o original em destino gastando o mínimo de I/O possível.
+    
+    Um hardlink é seguro porque a versão otimizada nunca é escrita sobre um
+    arquivo existente: imagens e vídeos são gravados em um temporário que
+    substitui a saída com os.replace, criando um novo inode e deixando o
+    original (e o backup que o compartilha) intacto. Quando o backup
+    fica em outro sistema de arquivos, tenta-se um reflink e, por fim, uma
+    cópia comum. O backup é criado com um nome temporário e só então
+    substitui um destino existente, que nunca é apagado antes disso.
+    """
+    if mesmo_arquivo(origem, destino):
+        # Pasta de backup igual à de entrada, ou hardlink de uma execução anterior
+        logger.debug(f"Backup de {origem.name} já existe no destino")
+        return
+    
+    temporario = destino.with_name(f".{destino.name}.{os.getpid()}.backup")
+    try:
+        if modo == "hardlink":
+            try:
+                os.link(origem, temporario)
+                os.replace(temporario, destino)
+                return
+            except OSError:
+                pass
+        
+        if modo in ("hardlink", "reflink"):
+            try:
+                clonar_arquivo(origem, temporario)
+                os.replace(temporario, destino)
+                return
+            except OSError:
+                pass
+        
+        shutil.copy2(origem, temporario)
+        os.replace(temporario, destino)
+    finally:
+        if temporario.exists():
+            temporario.unlink()
+
+
+def verificar_bibliotecas_imagem() -> None:
+    """Registra qual build do Pillow e qual biblioteca JPEG estão em uso."""
+    try:
+        versao_pillow = PIL.__version__
+        if ".post" in versao_pillow:
+            versao_pillow += " (Pillow-SIMD)"
+        
+        if features.check_feature("libjpeg_turbo"):
+            biblioteca_jpeg = f"libjpeg-turbo {features.version_feature('libjpeg_turbo') or ''}".strip()
+        else:
+            biblioteca_jpeg = f"libjpeg {features.version('jpg') or ''}".strip()
+        
+        logger.info(f"Pillow {versao_pillow} usando {biblioteca_jpeg}")
+        if "turbo" not in biblioteca_jpeg:
+            logger.info("Para codificação JPEG mais rápida instale o Pillow-SIMD com libjpeg-turbo (veja o README)")
+    except Exception as e:
+        logger.debug(f"Não foi possível identificar a biblioteca JPEG: {e}")
+
+
+# Encoders H.264 em ordem de preferência; libx264 (CPU) é o último recurso
+CODECS_HARDWARE = ["h264_nvenc", "h264_qsv", "h264_videotoolbox"]
+PRESETS_QSV = ["veryfast", "faster", "fast", "medium", "slow", "slower", "veryslow"]
+
+
+def argumentos_codec(codec: str, crf: int, preset: str) -> Tuple[Dict, Dict, str]:
+    """Retorna (opções de entrada, opções do encoder, filtro de escala) para o codec.
+    
+    Usado tanto na codificação real quanto no teste de detectar_codec_video,
+    para que o teste valide exatamente as opções que serão usadas.
+    """
+    if codec == 'h264_nvenc':
+        # Decodifica na GPU e mantém os quadros na memória CUDA
+        return ({'hwaccel': 'cuda', 'hwaccel_output_format': 'cuda'},
+                {'cq': crf, 'preset': 'p4'}, 'scale_cuda')
+    if codec == 'h264_qsv':
+        return ({'hwaccel': 'qsv'},
+                {'global_quality': crf,
+                 'preset': preset if preset in PRESETS_QSV else 'veryfast'}, 'scale')
+    if codec == 'h264_videotoolbox':
+        # VideoToolbox usa escala de qualidade 1-100 (maior = melhor)
+        return ({'hwaccel': 'videotoolbox'},
+                {'q:v': max(1, min(100, round(100 - crf * 1.5)))}, 'scale')
+    return {}, {'crf': crf, 'preset': preset}, 'scale'
+
+
+@functools.lru_cache(maxsize=None)
+def detectar_codec_video(padrao: str = "libx264", crf: int = 23, preset: str = "medium") -> str:
+    """Retorna o melhor encoder H.264 disponível no ffmpeg instalado.
+    
+    Um encoder listado por `ffmpeg -encoders` pode não ter o dispositivo
+    correspondente (ex.: build com NVENC sem GPU NVIDIA) ou não aceitar o
+    modo de qualidade usado (ex.: -q:v do VideoToolbox em Macs Intel), por
+    isso cada candidato é testado com uma codificação curta usando as mesmas
+    opções de otimizar_video antes de ser escolhido.
+    """
+    try:
+        resultado = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            capture_output=True, text=True, timeout=30
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.warning(f"Não foi possível consultar os encoders do ffmpeg: {e}")
+        return padrao
+    
+    for codec in CODECS_HARDWARE:
+        if f" {codec} " not in resultado.stdout:
+            continue
+        opcoes_entrada, codec_args, _ = argumentos_codec(codec, crf, preset)
+        comando = (ffmpeg
+                   .input("color=black:s=256x256:d=0.1", f="lavfi", **opcoes_entrada)
+                   .output("-", f="null", **{'c:v': codec, **codec_args})
+                   .global_args("-hide_banner", "-loglevel", "error")
+                   .compile())
+        try:
+            teste = subprocess.run(comando, capture_output=True, timeout=30)
+        except (OSError, subprocess.SubprocessError):
+            continue
+        if teste.returncode == 0:
+            return codec
+        logger.debug(f"Encoder {codec} listado, mas indisponível neste sistema")
+    
+    return padrao
+
+
+STATUS_OTIMIZADO = "otimizado"
+STATUS_IGNORADO = "ignorado"
+STATUS_ERRO = "erro"
+
+ACAO_IGNORAR = "ignorar"
+ACAO_COPIAR = "copiar"
+ACAO_RECOMPRIMIR = "recomprimir"
+ACAO_RECODIFICAR = "recodificar"
+
+
+class Tarefa(NamedTuple):
+    """Decisão tomada por OtimizadorMidia.planejar para um arquivo."""
+    caminho: Path
+    tipo: str  # "imagem" ou "video"
+    acao: str
+    tamanho: int
+
+
+@dataclass
+class Estatisticas:
+    total_arquivos: int = 0
+    total_imagens: int = 0
+    total_videos: int = 0
+    imagens_otimizadas: int = 0
+    videos_otimizados: int = 0
+    arquivos_ignorados: int = 0
+    erros: int = 0
+    espaco_economizado: int = 0
+    tamanho_original: int = 0
+    tamanho_final: int = 0
+    inicio: float = field(default_factory=time.time)
+    fim: float = 0
+    
+    def acumular(self, resultados: Iterable[Tuple[int, int, str]], video: bool) -> None:
+        """Soma os resultados devolvidos pelos workers (uma única thread)."""
+        for tamanho_original, tamanho_novo, status in resultados:
+            if status == STATUS_OTIMIZADO:
+                self.tamanho_original += tamanho_original
+                self.tamanho_final += tamanho_novo
+                self.espaco_economizado += tamanho_original - tamanho_novo
+                if video:
+                    self.videos_otimizados += 1
+                else:
+                    self.imagens_otimizadas += 1
+            elif status == STATUS_IGNORADO:
+                self.arquivos_ignorados += 1
+            else:
+                self.erros += 1
+
+
+def otimizar_imagem(caminho_imagem: Path, sidecars: Optional[List[Path]], config: Dict, 
+                    pasta_entrada: Path, pasta_saida: Path, 
+                    pasta_backup: Optional[Path]) -> Tuple[int, int, str]:
+    """Otimiza uma imagem isolada.
+    
+    Função de nível de módulo para poder ser enviada a um ProcessPoolExecutor.
+    Retorna (tamanho_original, tamanho_novo, status); as estatísticas são
+    acumuladas pelo processo principal.
+    """
+    cfg = config["imagens"]
+    qualidade_jpg = cfg["qualidade_jpg"]
+    qualidade_png = cfg["qualidade_png"]
+    resolucao_max = cfg["resoluções_max"]
+    converter_png = cfg["converter_png_para_jpg"]
+    # optimize=True faz uma segunda passada para a tabela de Huffman: quase
+    # dobra o tempo de codificação para ~3% de ganho. subsampling=2 é 4:2:0
+    kwargs_jpeg = {'quality': qualidade_jpg, 'optimize': cfg["otimizar_huffman"],
+                   'progressive': False, 'subsampling': 2}
+    
+    try:
+        tamanho_original = caminho_imagem.stat().st_size
+        
+        metadata = ler_metadata_json(caminho_imagem, sidecars)
+        caminho_relativo = caminho_imagem.relative_to(pasta_entrada)
+        caminho_saida = pasta_saida / caminho_relativo
+        
+        if pasta_backup:
+            caminho_backup = pasta_backup / caminho_relativo
+            fazer_backup(caminho_imagem, caminho_backup, config["geral"]["modo_backup"])
+            copiar_metadata_json(caminho_imagem, caminho_backup, sidecars)
+        
+        formato = caminho_imagem.suffix.lower()
+        with Image.open(caminho_imagem) as img:
+            if resolucao_max:
+                max_width, max_height = resolucao_max
+                if img.width > max_width or img.height > max_height:
+                    if formato in ('.jpg', '.jpeg'):
+                        # Decodifica o JPEG já reduzido (1/2, 1/4 ou 1/8) pelo
+                        # libjpeg, evitando a IDCT completa de cada bloco
+                        img.draft(img.mode, (max_width, max_height))
+                    img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+            
+            if formato in ['.jpg', '.jpeg']:
+                formato_saida = 'JPEG'
+                kwargs = kwargs_jpeg
+            elif formato == '.png':
+                if converter_png:
+                    formato_saida = 'JPEG'
+                    caminho_saida = caminho_saida.with_suffix('.jpg')
+                    kwargs = kwargs_jpeg
+                else:
+                    formato_saida = 'PNG'
+                    kwargs = {'optimize': True, 
+                            'compress_level': qualidade_png}
+            else:
+                formato_saida = 'JPEG'
+                caminho_saida = caminho_saida.with_suffix('.jpg')
+                kwargs = kwargs_jpeg
+            
+            # Codifica em memória e grava o arquivo com uma única escrita
+            buffer = io.BytesIO()
+            img.save(buffer, formato_saida, **kwargs)
+        
+        # Grava em um temporário e troca com os.replace: caminho_saida pode ser
+        # um hardlink do original (backup em hardlink na pasta de saída, ou
+        # saída igual à entrada), e escrever nele truncaria o próprio original
+        temporario = caminho_saida.with_name(f".tmp_{os.getpid()}_{caminho_saida.name}")
+        try:
+            temporario.write_bytes(buffer.getbuffer())
+            os.replace(temporario, caminho_saida)
+        finally:
+            if temporario.exists():
+                temporario.unlink()
+        aplicar_data_captura(caminho_saida, metadata)
+        copiar_metadata_json(caminho_imagem, caminho_saida, sidecars)
+        
+        tamanho_novo = buffer.getbuffer().nbytes
+        return tamanho_original, tamanho_novo, STATUS_OTIMIZADO
+        
+    except Exception as e:
+        logger.error(f"Erro ao otimizar imagem {caminho_imagem}: {e}")
+        return 0, 0, STATUS_ERRO
+
+
 class OtimizadorMidia:
     def __init__(self, pasta_entrada: str, pasta_saida: Optional[str] = None, 
                  config: Optional[Dict] = None):
@@ -83,249 +451,335 @@ class OtimizadorMidia:
                 if categoria in self.config:
                     self.config[categoria].update(valores)
         
+        if self.config["videos"]["aceleracao_hardware"] and self.config["videos"]["codec"] == "libx264":
+            self.config["videos"]["codec"] = detectar_codec_video(
+                self.config["videos"]["codec"], self.config["videos"]["crf"], self.config["videos"]["preset"])
+        logger.info(f"Encoder de vídeo: {self.config['videos']['codec']}")
+        
+        # Cada ffmpeg já é multithread; dividir os núcleos entre poucos
+        # processos evita ter processos x núcleos threads disputando a CPU
+        nucleos = self.config["geral"]["processos"] or os.cpu_count() or 1
+        if not self.config["videos"]["processos"]:
+            self.config["videos"]["processos"] = max(1, nucleos // 4)
+        if not self.config["videos"]["threads"]:
+            self.config["videos"]["threads"] = max(2, nucleos // self.config["videos"]["processos"])
+        
         self.pasta_backup = None
         if self.config["geral"]["manter_originais"]:
             self.pasta_backup = (Path(self.config["geral"]["pasta_backup"]).absolute() 
                                if self.config["geral"]["pasta_backup"] 
                                else self.pasta_entrada / "originais")
         
-        self.pasta_saida.mkdir(exist_ok=True, parents=True)
-        if self.pasta_backup:
-            self.pasta_backup.mkdir(exist_ok=True, parents=True)
-        
-        self.estatisticas = {
-            "total_arquivos": 0,
-            "total_imagens": 0,
-            "total_videos": 0,
-            "imagens_otimizadas": 0,
-            "videos_otimizados": 0,
-            "arquivos_ignorados": 0,
-            "erros": 0,
-            "espaco_economizado": 0,
-            "tamanho_original": 0,
-            "tamanho_final": 0,
-            "inicio": time.time(),
-            "fim": 0
-        }
+        self.estatisticas = Estatisticas()
         
-        ImageFile.LOAD_TRUNCATED_IMAGES = True
         self.metadata_cache = {}
+        self.sidecars_json: Dict[str, List[Path]] = {}
+        self._pastas_criadas: Set[Path] = set()
+        self.tamanhos: Dict[Path, int] = {}
+        self.mtimes: Dict[Path, float] = {}
+        self._plan: List[Tarefa] = []
     
-    def ler_metadata_json(self, caminho_arquivo: Path) -> Optional[Dict]:
-        try:
-            json_path = Path(f"{caminho_arquivo}.json")
-            metadata_path = Path(f"{caminho_arquivo}.supplemental-metadata.json")
-            
-            if metadata_path.exists():
-                with open(metadata_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            elif json_path.exists():
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            
-            return None
-        except Exception as e:
-            logger.warning(f"Erro ao ler metadata JSON para {caminho_arquivo.name}: {e}")
-            return None
-    
-    def copiar_metadata_json(self, origem: Path, destino: Path) -> None:
-        try:
-            for ext in ['.json', '.supplemental-metadata.json']:
-                json_origem = Path(f"{origem}{ext}")
-                if json_origem.exists():
-                    json_destino = Path(f"{destino}{ext}")
-                    shutil.copy2(json_origem, json_destino)
-        except Exception as e:
-            logger.warning(f"Erro ao copiar metadata JSON: {e}")
+    def registrar_metadata_json(self, caminho_json: str) -> None:
+        """Associa um JSON do Google Fotos à mídia correspondente."""
+        for sufixo in SUFIXOS_JSON:
+            if caminho_json.endswith(sufixo):
+                sidecars = self.sidecars_json.setdefault(caminho_json[:-len(sufixo)], [])
+                sidecars.append(Path(caminho_json))
+                # .supplemental-metadata.json tem prioridade na leitura
+                sidecars.sort(key=lambda p: not str(p).endswith(SUFIXOS_JSON[0]))
+                return
     
     def procurar_arquivos(self) -> Tuple[List[Path], List[Path]]:
         logger.info(f"Analisando arquivos em: {self.pasta_entrada}")
         
         imagens = []
         videos = []
+        extensoes_imagem = frozenset(e.lower() for e in self.config["geral"]["extensoes_imagem"])
+        extensoes_video = frozenset(e.lower() for e in self.config["geral"]["extensoes_video"])
+        
+        # DFS iterativa com os.scandir: o tipo de cada entrada já vem da
+        # listagem do diretório, sem um stat() extra por arquivo
+        pendentes = [str(self.pasta_entrada)]
+        while pendentes:
+            try:
+                with os.scandir(pendentes.pop()) as entradas:
+                    for entrada in entradas:
+                        if entrada.is_dir(follow_symlinks=False):
+                            pendentes.append(entrada.path)
+                        elif entrada.is_file():
+                            ext = os.path.splitext(entrada.name)[1].lower()
+                            if ext == '.json':
+                                self.registrar_metadata_json(entrada.path)
+                            elif ext in extensoes_imagem or ext in extensoes_video:
+                                # Um arquivo com erro (removido durante a busca,
+                                # sem permissão) não interrompe o resto da pasta
+                                try:
+                                    info = entrada.stat()
+                                except OSError as e:
+                                    logger.warning(f"Ignorando {entrada.path}: {e}")
+                                    continue
+                                caminho = Path(entrada.path)
+                                self.tamanhos[caminho] = info.st_size
+                                self.mtimes[caminho] = info.st_mtime
+                                if ext in extensoes_imagem:
+                                    imagens.append(caminho)
+                                else:
+                                    videos.append(caminho)
+            except OSError as e:
+                logger.warning(f"Erro ao listar diretório: {e}")
         
-        for item in self.pasta_entrada.rglob("*"):
-            if item.is_file():
-                if item.suffix.lower().endswith(('.json', '.metadata')):
-                    continue
-                    
-                ext = item.suffix.lower()
-                if ext in [x.lower() for x in self.config["geral"]["extensoes_imagem"]]:
-                    imagens.append(item)
-                elif ext in [x.lower() for x in self.config["geral"]["extensoes_video"]]:
-                    videos.append(item)
-        
-        self.estatisticas.update({
-            "total_imagens": len(imagens),
-            "total_videos": len(videos),
-            "total_arquivos": len(imagens) + len(videos)
-        })
+        self.estatisticas.total_imagens = len(imagens)
+        self.estatisticas.total_videos = len(videos)
+        self.estatisticas.total_arquivos = len(imagens) + len(videos)
         
         logger.info(f"Encontrados: {len(imagens)} imagens e {len(videos)} vídeos")
         return imagens, videos
     
-    def otimizar_imagem(self, caminho_imagem: Path) -> Optional[Path]:
-        try:
-            tamanho_original = caminho_imagem.stat().st_size
-            
-            if (self.config["imagens"]["ignorar_pequenas"] and 
-                tamanho_original < self.config["imagens"]["tamanho_minimo_kb"] * 1024):
-                logger.debug(f"Ignorando imagem pequena: {caminho_imagem.name}")
-                self.estatisticas["arquivos_ignorados"] += 1
-                return None
-            
-            metadata = self.ler_metadata_json(caminho_imagem)
-            caminho_relativo = caminho_imagem.relative_to(self.pasta_entrada)
-            caminho_saida = self.pasta_saida / caminho_relativo
-            caminho_saida.parent.mkdir(exist_ok=True, parents=True)
-            
-            if self.pasta_backup:
-                caminho_backup = self.pasta_backup / caminho_relativo
-                caminho_backup.parent.mkdir(exist_ok=True, parents=True)
-                shutil.copy2(caminho_imagem, caminho_backup)
-                self.copiar_metadata_json(caminho_imagem, caminho_backup)
-            
-            with Image.open(caminho_imagem) as img:
-                if self.config["imagens"]["resoluções_max"]:
-                    max_width, max_height = self.config["imagens"]["resoluções_max"]
-                    if img.width > max_width or img.height > max_height:
-                        img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
-                
-                formato = caminho_imagem.suffix.lower()
-                if formato in ['.jpg', '.jpeg']:
-                    formato_saida = 'JPEG'
-                    kwargs = {'quality': self.config["imagens"]["qualidade_jpg"], 
-                            'optimize': True}
-                elif formato == '.png':
-                    if self.config["imagens"]["converter_png_para_jpg"]:
-                        formato_saida = 'JPEG'
-                        caminho_saida = caminho_saida.with_suffix('.jpg')
-                        kwargs = {'quality': self.config["imagens"]["qualidade_jpg"], 
-                                'optimize': True}
-                    else:
-                        formato_saida = 'PNG'
-                        kwargs = {'optimize': True, 
-                                'compress_level': self.config["imagens"]["qualidade_png"]}
-                else:
-                    formato_saida = 'JPEG'
-                    caminho_saida = caminho_saida.with_suffix('.jpg')
-                    kwargs = {'quality': self.config["imagens"]["qualidade_jpg"], 
-                            'optimize': True}
-                
-                img.save(caminho_saida, formato_saida, **kwargs)
-            
-            self.copiar_metadata_json(caminho_imagem, caminho_saida)
-            
-            tamanho_novo = caminho_saida.stat().st_size
-            economia = tamanho_original - tamanho_novo
-            
-            self.estatisticas.update({
-                "tamanho_original": self.estatisticas["tamanho_original"] + tamanho_original,
-                "tamanho_final": self.estatisticas["tamanho_final"] + tamanho_novo,
-                "espaco_economizado": self.estatisticas["espaco_economizado"] + economia,
-                "imagens_otimizadas": self.estatisticas["imagens_otimizadas"] + 1
-            })
-            
-            return caminho_saida
-            
-        except Exception as e:
-            logger.error(f"Erro ao otimizar imagem {caminho_imagem}: {e}")
-            self.estatisticas["erros"] += 1
-            return None
+    def analisar_video(self, caminho_video: Path, mtime: float) -> Optional[Dict]:
+        """Executa ffprobe no vídeo, reaproveitando o resultado enquanto o arquivo não mudar."""
+        chave = (str(caminho_video), mtime)
+        if chave not in self.metadata_cache:
+            try:
+                self.metadata_cache[chave] = ffmpeg.probe(str(caminho_video))
+            except Exception as e:
+                logger.debug(f"Não foi possível analisar {caminho_video.name}: {e}")
+                self.metadata_cache[chave] = None
+        return self.metadata_cache[chave]
     
-    def otimizar_video(self, caminho_video: Path) -> Optional[Path]:
+    def video_ja_eficiente(self, caminho_video: Path, mtime: float) -> bool:
+        """Indica se o vídeo já usa um codec moderno com bitrate abaixo do limite.
+        
+        O limite é definido para 1080p e ajustado proporcionalmente ao número
+        de pixels do vídeo.
+        """
+        probe = self.analisar_video(caminho_video, mtime)
+        if not probe:
+            return False
+        
+        stream_video = next((s for s in probe.get("streams", []) 
+                             if s.get("codec_type") == "video"), None)
+        bit_rate = probe.get("format", {}).get("bit_rate")
+        if not stream_video or not bit_rate:
+            return False
+        
+        if stream_video.get("codec_name") not in self.config["videos"]["codecs_eficientes"]:
+            return False
+        
+        pixels = int(stream_video.get("width") or 1920) * int(stream_video.get("height") or 1080)
+        limite = self.config["videos"]["bitrate_eficiente_kbps"] * 1000 * pixels / (1920 * 1080)
+        return int(bit_rate) < limite
+    
+    def montar_comando_ffmpeg(self, caminho_video: Path, caminho_saida: Path,
+                              codec: Optional[str] = None) -> List[str]:
+        """Monta a linha de comando do ffmpeg para recodificar um vídeo.
+        
+        Sem `codec`, usa o encoder escolhido em config['videos']['codec'].
+        """
+        # Enhanced FFmpeg configuration
+        codec = codec or self.config["videos"]["codec"]
+        opcoes_entrada, codec_args, filtro_escala = argumentos_codec(
+            codec, self.config["videos"]["crf"], self.config["videos"]["preset"])
+        stream = ffmpeg.input(str(caminho_video), err_detect='ignore_err', **opcoes_entrada)
+        
+        video_args = {
+            'c:v': codec,
+            **codec_args,
+            'map_metadata': 0,
+            'threads': self.config["videos"]["threads"],
+            'max_muxing_queue_size': 1024
+        }
+        
+        # faststart reescreve o arquivo inteiro ao final para mover o
+        # átomo moov; só faz sentido para saídas MP4
+        if caminho_saida.suffix.lower() in ('.mp4', '.m4v'):
+            video_args['movflags'] = '+faststart'
+        
+        if self.config["videos"]["escala_max"]:
+            max_width, max_height = self.config["videos"]["escala_max"]
+            video_args['vf'] = f'{filtro_escala}=w={max_width}:h={max_height}:force_original_aspect_ratio=decrease'
+        
+        audio_args = {
+            'c:a': 'aac',
+            'b:a': self.config["videos"]["audio_bitrate"],
+            'strict': 'experimental',
+            'ar': 48000
+        }
+        
+        args = {**video_args, **audio_args}
+        saida = ffmpeg.output(stream, str(caminho_saida), **args)
+        return saida.global_args('-hide_banner', '-nostats').compile(overwrite_output=True)
+    
+    async def executar_ffmpeg(self, comando: List[str], caminho_saida: Path) -> Tuple[int, bytes]:
+        """Roda o ffmpeg sem bloquear o loop; retorna (código de saída, stderr).
+        
+        `caminho_saida` é o arquivo que o ffmpeg está gravando (nunca o de
+        entrada) e é removido se a execução for cancelada.
+        """
+        processo = await asyncio.create_subprocess_exec(
+            *comando,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
         try:
-            tamanho_original = caminho_video.stat().st_size
-            
-            if (self.config["videos"]["ignorar_pequenos"] and 
-                tamanho_original < self.config["videos"]["tamanho_minimo_mb"] * 1024 * 1024):
-                logger.debug(f"Ignorando vídeo pequeno: {caminho_video.name}")
-                self.estatisticas["arquivos_ignorados"] += 1
-                return None
-            
-            metadata = self.ler_metadata_json(caminho_video)
-            caminho_relativo = caminho_video.relative_to(self.pasta_entrada)
-            caminho_saida = self.pasta_saida / caminho_relativo
-            caminho_saida.parent.mkdir(exist_ok=True, parents=True)
-            
-            if self.pasta_backup:
-                caminho_backup = self.pasta_backup / caminho_relativo
-                caminho_backup.parent.mkdir(exist_ok=True, parents=True)
-                shutil.copy2(caminho_video, caminho_backup)
-                self.copiar_metadata_json(caminho_video, caminho_backup)
-            
-            # Enhanced FFmpeg configuration
-            stream = ffmpeg.input(str(caminho_video), err_detect='ignore_err')
-            
-            video_args = {
-                'c:v': self.config["videos"]["codec"],
-                'crf': self.config["videos"]["crf"],
-                'preset': self.config["videos"]["preset"],
-                'map_metadata': 0,
-                'max_muxing_queue_size': 1024,
-                'movflags': '+faststart'
-            }
-            
-            if self.config["videos"]["escala_max"]:
-                max_width, max_height = self.config["videos"]["escala_max"]
-                video_args['vf'] = f'scale=w={max_width}:h={max_height}:force_original_aspect_ratio=decrease'
-            
-            audio_args = {
-                'c:a': 'aac',
-                'b:a': self.config["videos"]["audio_bitrate"],
-                'strict': 'experimental',
-                'ar': 48000
-            }
-            
-            args = {**video_args, **audio_args}
-            
+            _, stderr = await processo.communicate()
+        except asyncio.CancelledError:
+            # Ctrl-C: encerra o ffmpeg e não deixa saída incompleta
+            processo.kill()
+            await processo.wait()
+            if caminho_saida.exists():
+                caminho_saida.unlink()
+            raise
+        return processo.returncode, stderr
+    
+    async def otimizar_video(self, tarefa: Tarefa, 
+                             semaforo: asyncio.Semaphore) -> Tuple[int, int, str]:
+        """Executa a ação planejada para um vídeo.
+        
+        O ffmpeg roda como subprocesso supervisionado pelo loop de eventos,
+        sem uma thread bloqueada por vídeo. Retorna (tamanho_original,
+        tamanho_novo, status) como otimizar_imagem.
+        """
+        caminho_video = tarefa.caminho
+        async with semaforo:
+            loop = asyncio.get_running_loop()
             try:
-                # Create temporary file path
-                temp_output = caminho_saida.with_name(f"temp_{caminho_saida.name}")
+                tamanho_original = caminho_video.stat().st_size
                 
-                # First pass: process video
-                ffmpeg.output(stream, str(temp_output), **args).run(
-                    quiet=True,
-                    overwrite_output=True,
-                    capture_stderr=True
-                )
+                sidecars = self.sidecars_json.get(str(caminho_video), [])
+                metadata = ler_metadata_json(caminho_video, sidecars)
+                caminho_relativo = caminho_video.relative_to(self.pasta_entrada)
+                caminho_saida = self.pasta_saida / caminho_relativo
                 
-                # Check if temporary file was created successfully
-                if not temp_output.exists():
-                    raise FileNotFoundError(f"Arquivo temporário não foi criado: {temp_output}")
+                if tarefa.acao == ACAO_COPIAR:
+                    logger.debug(f"Vídeo já eficiente, mantido sem recodificar: {caminho_video.name}")
+                    if not mesmo_arquivo(caminho_video, caminho_saida):
+                        await loop.run_in_executor(None, shutil.copy2, caminho_video, caminho_saida)
+                    aplicar_data_captura(caminho_saida, metadata)
+                    copiar_metadata_json(caminho_video, caminho_saida, sidecars)
+                    return 0, 0, STATUS_IGNORADO
                 
-                # Move temporary file to final destination
-                if temp_output.exists():
-                    if caminho_saida.exists():
-                        caminho_saida.unlink()
-                    temp_output.rename(caminho_saida)
+                if self.pasta_backup:
+                    caminho_backup = self.pasta_backup / caminho_relativo
+                    await loop.run_in_executor(None, fazer_backup, caminho_video, caminho_backup,
+                                               self.config["geral"]["modo_backup"])
+                    copiar_metadata_json(caminho_video, caminho_backup, sidecars)
                 
-            except ffmpeg.Error as e:
-                logger.error(f"Erro FFmpeg: {e.stderr.decode() if hasattr(e, 'stderr') else str(e)}")
-                if temp_output.exists():
-                    temp_output.unlink()
-                raise
-            
-            self.copiar_metadata_json(caminho_video, caminho_saida)
-            
-            tamanho_novo = caminho_saida.stat().st_size
-            economia = tamanho_original - tamanho_novo
-            
-            self.estatisticas.update({
-                "tamanho_original": self.estatisticas["tamanho_original"] + tamanho_original,
-                "tamanho_final": self.estatisticas["tamanho_final"] + tamanho_novo,
-                "espaco_economizado": self.estatisticas["espaco_economizado"] + economia,
-                "videos_otimizados": self.estatisticas["videos_otimizados"] + 1
-            })
-            
-            return caminho_saida
-            
-        except Exception as e:
-            logger.error(f"Erro ao otimizar vídeo {caminho_video}: {e}")
-            self.estatisticas["erros"] += 1
-            return None
+                # Se a saída for o próprio vídeo de entrada (pasta de saída igual
+                # à de entrada), o ffmpeg grava em um temporário na mesma pasta,
+                # que depois substitui o original com os.replace. Só o caminho
+                # de escrita, que nunca é a entrada, pode ser apagado em caso de erro
+                caminho_escrita = caminho_saida
+                if mesmo_arquivo(caminho_video, caminho_saida):
+                    caminho_escrita = caminho_saida.with_name(f".tmp_{os.getpid()}_{caminho_saida.name}")
+                
+                comando = self.montar_comando_ffmpeg(caminho_video, caminho_escrita)
+                codigo, stderr = await self.executar_ffmpeg(comando, caminho_escrita)
+                
+                codec = self.config["videos"]["codec"]
+                if codigo != 0 and codec != "libx264":
+                    # O encoder de hardware passou no teste inicial, mas pode
+                    # recusar este arquivo (resolução, perfil, sessões da GPU)
+                    logger.warning(f"Encoder {codec} falhou em {caminho_video.name}; "
+                                   f"recodificando com libx264")
+                    comando = self.montar_comando_ffmpeg(caminho_video, caminho_escrita, codec="libx264")
+                    codigo, stderr = await self.executar_ffmpeg(comando, caminho_escrita)
+                
+                if codigo != 0:
+                    logger.error(f"Erro FFmpeg: {stderr.decode(errors='replace')}")
+                    # Não deixar um arquivo incompleto na pasta de saída
+                    if caminho_escrita.exists():
+                        caminho_escrita.unlink()
+                    raise RuntimeError(f"ffmpeg terminou com código {codigo}")
+                
+                if caminho_escrita != caminho_saida:
+                    os.replace(caminho_escrita, caminho_saida)
+                
+                aplicar_data_captura(caminho_saida, metadata)
+                copiar_metadata_json(caminho_video, caminho_saida, sidecars)
+                
+                tamanho_novo = caminho_saida.stat().st_size
+                return tamanho_original, tamanho_novo, STATUS_OTIMIZADO
+                
+            except Exception as e:
+                logger.error(f"Erro ao otimizar vídeo {caminho_video}: {e}")
+                return 0, 0, STATUS_ERRO
+    
+    async def processar_videos(self, tarefas: List[Tarefa]) -> List[Tuple[int, int, str]]:
+        """Recodifica os vídeos com no máximo config['videos']['processos'] ffmpeg simultâneos."""
+        semaforo = asyncio.Semaphore(self.config["videos"]["processos"])
+        # As tasks são criadas na ordem do plano (maiores primeiro) para que
+        # disputem o semáforo nessa ordem; as_completed receberia um conjunto
+        execucoes = [asyncio.ensure_future(self.otimizar_video(tarefa, semaforo))
+                     for tarefa in tarefas]
+        return [await execucao for execucao in tqdm_asyncio.as_completed(
+            execucoes,
+            total=len(execucoes),
+            desc="Otimizando vídeos",
+            unit="vid"
+        )]
     
-    def processar_todos(self) -> None:
+    def criar_pastas(self, arquivos: List[Path]) -> None:
+        """Cria de uma só vez as pastas de saída e de backup dos arquivos.
+        
+        Assim os workers não precisam chamar mkdir() para cada arquivo.
+        """
+        relativas = {p.parent.relative_to(self.pasta_entrada) for p in arquivos}
+        relativas.add(Path("."))
+        destinos = [self.pasta_saida] + ([self.pasta_backup] if self.pasta_backup else [])
+        for destino in destinos:
+            for relativa in sorted(relativas):
+                pasta = destino / relativa
+                if pasta not in self._pastas_criadas:
+                    pasta.mkdir(exist_ok=True, parents=True)
+                    self._pastas_criadas.add(pasta)
+    
+    def planejar(self, imagens: List[Path], videos: List[Path]) -> List[Tarefa]:
+        """Classifica cada arquivo antes do processamento.
+        
+        As tarefas ficam ordenadas da maior para a menor dentro de cada tipo
+        (LPT): os arquivos pequenos preenchem o final do lote em vez de um
+        arquivo grande atrasar o término.
+        """
+        cfg_img = self.config["imagens"]
+        cfg_vid = self.config["videos"]
+        minimo_img = cfg_img["tamanho_minimo_kb"] * 1024 if cfg_img["ignorar_pequenas"] else 0
+        minimo_vid = cfg_vid["tamanho_minimo_mb"] * 1024 * 1024 if cfg_vid["ignorar_pequenos"] else 0
+        
+        plano = []
+        for caminho in sorted(imagens, key=self.tamanhos.__getitem__, reverse=True):
+            tamanho = self.tamanhos[caminho]
+            acao = ACAO_IGNORAR if tamanho < minimo_img else ACAO_RECOMPRIMIR
+            plano.append(Tarefa(caminho, "imagem", acao, tamanho))
+        
+        for caminho in sorted(videos, key=self.tamanhos.__getitem__, reverse=True):
+            tamanho = self.tamanhos[caminho]
+            if tamanho < minimo_vid:
+                acao = ACAO_IGNORAR
+            elif (cfg_vid["pular_eficientes"] and 
+                  self.video_ja_eficiente(caminho, self.mtimes[caminho])):
+                acao = ACAO_COPIAR
+            else:
+                acao = ACAO_RECODIFICAR
+            plano.append(Tarefa(caminho, "video", acao, tamanho))
+        
+        self._plan = plano
+        return plano
+    
+    def exibir_plano(self) -> None:
+        """Mostra o que seria feito com cada arquivo, sem alterar nada."""
+        linhas = ["", "="*50, "PLANO DE OTIMIZAÇÃO (simulação)", "="*50]
+        for tarefa in self._plan:
+            caminho_relativo = tarefa.caminho.relative_to(self.pasta_entrada)
+            linhas.append(f"{tarefa.acao:<12} {tarefa.tamanho / (1024 * 1024):>10.2f} MB  {caminho_relativo}")
+        linhas.append("-"*50)
+        for acao in (ACAO_RECOMPRIMIR, ACAO_RECODIFICAR, ACAO_COPIAR, ACAO_IGNORAR):
+            tarefas = [t for t in self._plan if t.acao == acao]
+            tamanho_mb = sum(t.tamanho for t in tarefas) / (1024 * 1024)
+            linhas.append(f"{acao:<12} {len(tarefas):>6} arquivos  {tamanho_mb:>10.2f} MB")
+        sys.stdout.write("\n".join(linhas) + "\n")
+    
+    def processar_todos(self, simular: bool = False) -> None:
         imagens, videos = self.procurar_arquivos()
         total = len(imagens) + len(videos)
         
@@ -333,80 +787,95 @@ class OtimizadorMidia:
             logger.warning("Nenhum arquivo de mídia encontrado para otimizar.")
             return
         
+        plano = self.planejar(imagens, videos)
+        if simular:
+            self.exibir_plano()
+            return
+        
         logger.info(f"Iniciando otimização de {total} arquivos...")
+        tarefas_imagem = [t for t in plano if t.tipo == "imagem" and t.acao != ACAO_IGNORAR]
+        tarefas_video = [t for t in plano if t.tipo == "video" and t.acao != ACAO_IGNORAR]
+        self.estatisticas.arquivos_ignorados += sum(1 for t in plano if t.acao == ACAO_IGNORAR)
+        self.criar_pastas([t.caminho for t in tarefas_imagem + tarefas_video])
         max_workers = self.config["geral"]["processos"]
         
-        if imagens:
-            logger.info(f"Otimizando {len(imagens)} imagens...")
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                list(tqdm(
-                    executor.map(self.otimizar_imagem, imagens),
+        if tarefas_imagem:
+            logger.info(f"Otimizando {len(tarefas_imagem)} imagens...")
+            imagens = [t.caminho for t in tarefas_imagem]
+            tarefa = functools.partial(
+                otimizar_imagem,
+                config=self.config,
+                pasta_entrada=self.pasta_entrada,
+                pasta_saida=self.pasta_saida,
+                pasta_backup=self.pasta_backup
+            )
+            chunksize = max(1, len(imagens) // (max_workers * 4))
+            with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+                resultados = list(tqdm(
+                    executor.map(tarefa, imagens,
+                                 [self.sidecars_json.get(str(p), []) for p in imagens],
+                                 chunksize=chunksize),
                     total=len(imagens),
                     desc="Otimizando imagens",
                     unit="img"
                 ))
+            
+            self.estatisticas.acumular(resultados, video=False)
         
-        if videos:
-            logger.info(f"Otimizando {len(videos)} vídeos...")
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                list(tqdm(
-                    executor.map(self.otimizar_video, videos),
-                    total=len(videos),
-                    desc="Otimizando vídeos",
-                    unit="vid"
-                ))
+        if tarefas_video:
+            logger.info(f"Otimizando {len(tarefas_video)} vídeos...")
+            resultados = asyncio.run(self.processar_videos(tarefas_video))
+            self.estatisticas.acumular(resultados, video=True)
         
-        self.estatisticas["fim"] = time.time()
+        self.estatisticas.fim = time.time()
         self.exibir_estatisticas()
     
     def exibir_estatisticas(self) -> None:
         """Exibe estatísticas da otimização."""
-        tempo_total = self.estatisticas["fim"] - self.estatisticas["inicio"]
-        espaco_economizado_mb = self.estatisticas["espaco_economizado"] / (1024 * 1024)
-        tamanho_original_mb = self.estatisticas["tamanho_original"] / (1024 * 1024)
-        tamanho_final_mb = self.estatisticas["tamanho_final"] / (1024 * 1024)
+        tempo_total = self.estatisticas.fim - self.estatisticas.inicio
+        espaco_economizado_mb = self.estatisticas.espaco_economizado / (1024 * 1024)
+        tamanho_original_mb = self.estatisticas.tamanho_original / (1024 * 1024)
+        tamanho_final_mb = self.estatisticas.tamanho_final / (1024 * 1024)
         
         if tamanho_original_mb > 0:
             porcentagem_reducao = (espaco_economizado_mb / tamanho_original_mb) * 100
         else:
             porcentagem_reducao = 0
             
-        print("\n" + "="*50)
-        print(f"ESTATÍSTICAS DE OTIMIZAÇÃO")
-        print("="*50)
-        print(f"Tempo de processamento: {tempo_total:.2f} segundos")
-        print(f"Arquivos processados: {self.estatisticas['total_arquivos']}")
-        print(f"  - Imagens otimizadas: {self.estatisticas['imagens_otimizadas']} de {self.estatisticas['total_imagens']}")
-        print(f"  - Vídeos otimizados: {self.estatisticas['videos_otimizados']} de {self.estatisticas['total_videos']}")
-        print(f"  - Arquivos ignorados: {self.estatisticas['arquivos_ignorados']}")
-        print(f"  - Erros: {self.estatisticas['erros']}")
-        print(f"Tamanho original: {tamanho_original_mb:.2f} MB")
-        print(f"Tamanho final: {tamanho_final_mb:.2f} MB")
-        print(f"Espaço economizado: {espaco_economizado_mb:.2f} MB ({porcentagem_reducao:.1f}%)")
+        resumo = [
+            f"Tempo de processamento: {tempo_total:.2f} segundos",
+            f"Arquivos processados: {self.estatisticas.total_arquivos}",
+            f"  - Imagens otimizadas: {self.estatisticas.imagens_otimizadas} de {self.estatisticas.total_imagens}",
+            f"  - Vídeos otimizados: {self.estatisticas.videos_otimizados} de {self.estatisticas.total_videos}",
+            f"  - Arquivos ignorados: {self.estatisticas.arquivos_ignorados}",
+            f"  - Erros: {self.estatisticas.erros}",
+            f"Tamanho original: {tamanho_original_mb:.2f} MB",
+            f"Tamanho final: {tamanho_final_mb:.2f} MB",
+            f"Espaço economizado: {espaco_economizado_mb:.2f} MB ({porcentagem_reducao:.1f}%)",
+        ]
+        
+        # Console e relatório são montados inteiros e gravados de uma vez
+        sys.stdout.write("\n".join(["", "="*50, "ESTATÍSTICAS DE OTIMIZAÇÃO", "="*50, *resumo, ""]))
         
         # Salvar relatório em arquivo
-        relatorio = self.pasta_saida / f"relatorio_otimizacao_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-        with open(relatorio, 'w', encoding='utf-8') as f:
-            f.write("RELATÓRIO DE OTIMIZAÇÃO DE MÍDIA\n")
-            f.write(f"Data: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Pasta de entrada: {self.pasta_entrada}\n")
-            f.write(f"Pasta de saída: {self.pasta_saida}\n")
-            f.write("\n")
-            f.write(f"Tempo de processamento: {tempo_total:.2f} segundos\n")
-            f.write(f"Arquivos processados: {self.estatisticas['total_arquivos']}\n")
-            f.write(f"  - Imagens otimizadas: {self.estatisticas['imagens_otimizadas']} de {self.estatisticas['total_imagens']}\n")
-            f.write(f"  - Vídeos otimizados: {self.estatisticas['videos_otimizados']} de {self.estatisticas['total_videos']}\n")
-            f.write(f"  - Arquivos ignorados: {self.estatisticas['arquivos_ignorados']}\n")
-            f.write(f"  - Erros: {self.estatisticas['erros']}\n")
-            f.write(f"Tamanho original: {tamanho_original_mb:.2f} MB\n")
-            f.write(f"Tamanho final: {tamanho_final_mb:.2f} MB\n")
-            f.write(f"Espaço economizado: {espaco_economizado_mb:.2f} MB ({porcentagem_reducao:.1f}%)\n")
+        agora = datetime.now()
+        relatorio = self.pasta_saida / f"relatorio_otimizacao_{agora.strftime('%Y%m%d_%H%M%S')}.txt"
+        relatorio.write_text("\n".join([
+            "RELATÓRIO DE OTIMIZAÇÃO DE MÍDIA",
+            f"Data: {agora.strftime('%Y-%m-%d %H:%M:%S')}",
+            f"Pasta de entrada: {self.pasta_entrada}",
+            f"Pasta de saída: {self.pasta_saida}",
+            "",
+            *resumo,
+            "",
+        ]), encoding='utf-8')
         
         logger.info(f"Relatório salvo em: {relatorio}")
-        print("-"*50)
-        print(f"Processo concluído! Arquivos otimizados salvos em: {self.pasta_saida}")
+        linhas = ["-"*50, f"Processo concluído! Arquivos otimizados salvos em: {self.pasta_saida}"]
         if self.pasta_backup:
-            print(f"Arquivos originais preservados em: {self.pasta_backup}")
+            linhas.append(f"Arquivos originais preservados em: {self.pasta_backup}")
+        sys.stdout.write("\n".join(linhas) + "\n")
+        sys.stdout.flush()
 
 
 def main():
@@ -428,15 +897,32 @@ def main():
     parser.add_argument("-j", "--qualidade-jpg", type=int, default=85,
                         help="Qualidade JPEG (1-100)")
     
+    parser.add_argument("--jpeg-optimize", dest="jpeg_optimize", action="store_true",
+                        help="Otimizar as tabelas de Huffman do JPEG (arquivos ~3%% menores, "
+                             "codificação até 2x mais lenta)")
+    parser.add_argument("--no-jpeg-optimize", dest="jpeg_optimize", action="store_false",
+                        help="Codificar JPEG em uma única passada")
+    parser.set_defaults(jpeg_optimize=False)
+    
     parser.add_argument("--converter-png", action="store_true",
                         help="Converter PNGs para JPG")
     
     parser.add_argument("--sem-backup", action="store_true",
                         help="Não fazer backup dos arquivos originais")
     
+    parser.add_argument("--backup-mode", type=str, default="hardlink", choices=MODOS_BACKUP,
+                        help="Como criar o backup: hardlink e reflink não duplicam os dados "
+                             "e recorrem à cópia quando não são suportados")
+    
     parser.add_argument("-p", "--processos", type=int, default=os.cpu_count(),
                         help="Número de processos paralelos")
     
+    parser.add_argument("--processos-video", type=int, default=None,
+                        help="Número de vídeos codificados em paralelo (padrão: processos // 4)")
+    
+    parser.add_argument("--threads-ffmpeg", type=int, default=None,
+                        help="Threads por processo do ffmpeg (padrão: processos // vídeos em paralelo)")
+    
     parser.add_argument("--crf", type=int, default=23,
                         help="Fator de qualidade de vídeo (0-51, menor = melhor)")
     
@@ -445,6 +931,15 @@ def main():
                                  "fast", "medium", "slow", "slower", "veryslow"],
                         help="Preset de codificação de vídeo")
     
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Apenas mostrar o que seria feito com cada arquivo, sem processar")
+    
+    parser.add_argument("--recodificar-todos", action="store_true",
+                        help="Recodificar também vídeos que já estão em H.264/HEVC com bitrate baixo")
+    
+    parser.add_argument("--sem-gpu", action="store_true",
+                        help="Não usar encoders de hardware (NVENC/QuickSync/VideoToolbox)")
+    
     args = parser.parse_args()
     
     # Configurações personalizadas
@@ -452,15 +947,21 @@ def main():
         "imagens": {
             "qualidade_jpg": args.qualidade_jpg,
             "converter_png_para_jpg": args.converter_png,
+            "otimizar_huffman": args.jpeg_optimize,
         },
         "videos": {
             "crf": args.crf,
             "preset": args.preset,
+            "aceleracao_hardware": not args.sem_gpu,
+            "pular_eficientes": not args.recodificar_todos,
+            "processos": args.processos_video,
+            "threads": args.threads_ffmpeg,
         },
         "geral": {
             "processos": args.processos,
             "manter_originais": not args.sem_backup,
             "pasta_backup": args.pasta_backup,
+            "modo_backup": args.backup_mode,
         }
     }
     
@@ -469,9 +970,11 @@ def main():
         print(f"Erro: A pasta de entrada '{args.pasta_entrada}' não existe.")
         sys.exit(1)
     
+    verificar_bibliotecas_imagem()
+    
     # Iniciar otimização
     otimizador = OtimizadorMidia(args.pasta_entrada, args.pasta_saida, config)
-    otimizador.processar_todos()
+    otimizador.processar_todos(simular=args.dry_run)
 
 
 if __name__ == "__main__":